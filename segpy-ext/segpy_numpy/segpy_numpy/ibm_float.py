@@ -0,0 +1,205 @@
+"""Vectorised conversion of IBM floats held in Numpy arrays.
+
+These functions are the batch counterparts of the scalar conversions in
+segpy.ibm_float. They operate on whole buffers at once, so the per-value cost
+of the Python interpreter is paid only once per call.
+"""
+
+import numpy as np
+
+from segpy.ibm_float import EXPONENT_BIAS, MAX_BITS_PRECISION_IBM_FLOAT, MIN_IBM_FLOAT, MAX_IBM_FLOAT
+
+BITS_PER_NYBBLE = 4
+
+_F24 = float(2 ** MAX_BITS_PRECISION_IBM_FLOAT)
+
+# The value of a unit integer mantissa for each of the 128 biased base-16 exponents
+_SCALE = np.ldexp(1.0, BITS_PER_NYBBLE * (np.arange(128) - EXPONENT_BIAS) - MAX_BITS_PRECISION_IBM_FLOAT)
+
+# A unit mantissa scaled by this much, or more, saturates int8
+_INT8_SATURATION_SCALE = 128.0
+
+# Unsigned integer types with the same size as each supported floating point result type
+_FLOAT_BITS_TYPES = {np.dtype(np.float64): np.uint64,
+                     np.dtype(np.float32): np.uint32}
+
+
+def ibm2ieee_array(buf, out=None, dtype=np.float64):
+    """Interpret a buffer as a series of big-endian IBM floats.
+
+    Args:
+        buf: A bytes-like object with a length which is a multiple of four, a
+            Numpy array of uint8 containing big-endian IBM floats, or a Numpy
+            array of unsigned 32-bit integers each of which is the bit pattern
+            of an IBM float.
+
+        out: An optional one-dimensional, contiguous Numpy array of dtype
+            with one item for each IBM float in buf, into which the results
+            will be written. Supplying the same array for each block of a
+            large file avoids allocating a new result for every block.
+
+        dtype: The floating point type of the result, either float64 (the
+            default) or float32. IBM floats outside the range of float32 are
+            converted to infinities.
+
+    Returns:
+        A one-dimensional Numpy array of dtype. If out was supplied, it is returned.
+
+    Raises:
+        ValueError: If the buffer cannot be interpreted as whole four byte words,
+            if dtype is not supported, or if out is not of the required size and type.
+    """
+    dtype = np.dtype(dtype)
+    try:
+        bits_type = _FLOAT_BITS_TYPES[dtype]
+    except KeyError:
+        raise ValueError("Cannot convert IBM floats to dtype {}".format(dtype))
+
+    words = _ibm_words(buf)
+
+    if out is None:
+        out = np.empty(words.shape, dtype=dtype)
+    elif out.dtype != dtype or out.shape != words.shape or not out.flags.c_contiguous:
+        raise ValueError("Output array must be a contiguous {} array of shape {}".format(dtype, words.shape))
+
+    # Scaling the integer mantissa by a power of two looked up from the biased
+    # exponent is exact, and the sign bits of the IBM and IEEE formats coincide,
+    # so the result can be assembled with whole-array operations only.
+    mantissa = words & 0x00ffffff
+    with np.errstate(over='ignore'):
+        np.multiply(mantissa, _SCALE[(words >> 24) & 0x7f], out=out)
+    # Like ibm2ieee(), give positive zero for every zero, including negative ones
+    signs = (words >> 31) & (mantissa != 0)
+    sign_shift = bits_type(8 * dtype.itemsize - 1)
+    out.view(bits_type)[...] |= signs.astype(bits_type) << sign_shift
+    return out
+
+
+def ibm2bf16_array(buf):
+    """Interpret a buffer as a series of big-endian IBM floats, giving bfloat16 values.
+
+    Numpy has no bfloat16 type, so the values are returned as their 16-bit
+    patterns, which are the most significant halves of the corresponding
+    float32 values.
+
+    Args:
+        buf: Any buffer accepted by ibm2ieee_array().
+
+    Returns:
+        A one-dimensional Numpy array of uint16 bfloat16 bit patterns.
+
+    Raises:
+        ValueError: If the buffer cannot be interpreted as whole four byte words.
+    """
+    values = ibm2ieee_array(buf, dtype=np.float32)
+    return (values.view(np.uint32) >> 16).astype(np.uint16)
+
+
+def ibm2int8_array(buf, scale):
+    """Interpret a buffer as a series of big-endian IBM floats, quantized to int8.
+
+    Each value is multiplied by scale and rounded to the nearest integer, with
+    ties rounded to the nearest even integer, so 0.5 becomes 0 and 2.5 becomes 2.
+    Results saturate at the limits of int8.
+
+    Args:
+        buf: Any buffer accepted by ibm2ieee_array().
+        scale: A finite float by which each value is multiplied before rounding.
+
+    Returns:
+        A one-dimensional Numpy array of int8.
+
+    Raises:
+        ValueError: If the buffer cannot be interpreted as whole four byte words,
+            or if scale is not finite.
+    """
+    if not np.isfinite(scale):
+        raise ValueError("Cannot quantize IBM floats with scale {}".format(scale))
+
+    words = _ibm_words(buf)
+
+    # Fold the scale into the 128 exponent scale factors, rather than into every value.
+    # Any non-zero integer mantissa scaled by a factor of magnitude 128 or more
+    # saturates, so clipping the factors changes no result, but keeps them finite
+    # so that zero mantissas give zero rather than NaN.
+    with np.errstate(over='ignore'):
+        scale_factors = np.clip(_SCALE * scale, -_INT8_SATURATION_SCALE, _INT8_SATURATION_SCALE)
+    scaled = (words & 0x00ffffff) * scale_factors[(words >> 24) & 0x7f]
+    np.negative(scaled, out=scaled, where=(words >> 31).astype(bool))
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, np.iinfo(np.int8).min, np.iinfo(np.int8).max, out=scaled)
+    return scaled.astype(np.int8)
+
+
+def _ibm_words(buf):
+    """Obtain a one-dimensional native uint32 array of IBM float bit patterns."""
+    if isinstance(buf, np.ndarray):
+        if buf.dtype.kind == 'u' and buf.dtype.itemsize == 4:
+            return buf.astype(np.uint32, copy=False).reshape(-1)
+        if buf.dtype.itemsize == 1:
+            buf = np.ascontiguousarray(buf).reshape(-1)
+            if buf.size % 4 != 0:
+                raise ValueError("Buffer of {} bytes is not a whole number of IBM floats".format(buf.size))
+            return buf.view('>u4').astype(np.uint32)
+        raise ValueError("Cannot interpret array of dtype {} as IBM floats".format(buf.dtype))
+    return np.frombuffer(buf, dtype='>u4').astype(np.uint32)
+
+
+def ieee2ibm_array(values):
+    """Convert a series of floats to big-endian IBM floats.
+
+    Args:
+        values: An array-like series of floats.
+
+    Returns:
+        A one-dimensional Numpy array of big-endian unsigned 32-bit integers
+        each of which is the bit pattern of an IBM float. Use the tobytes()
+        method of the result to obtain the encoded bytes.
+
+    Raises:
+        OverflowError: If any value is outside the representable range.
+        ValueError: If any value is NaN or infinite.
+        FloatingPointError: If any value cannot be represented without total loss of precision.
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(-1)
+
+    if np.any(np.isnan(values)):
+        raise ValueError("NaN cannot be represented in IBM floating point")
+
+    if np.any(np.isinf(values)):
+        raise ValueError("Infinities cannot be represented in IBM floating point")
+
+    if np.any(values < MIN_IBM_FLOAT):
+        raise OverflowError("IEEE Floating point value {} is less than the "
+                            "representable minimum for IBM floats.".format(values.min()))
+
+    if np.any(values > MAX_IBM_FLOAT):
+        raise OverflowError("IEEE Floating point value {} is greater than the "
+                            "representable maximum for IBM floats".format(values.max()))
+
+    is_zero = values == 0
+    m, e = np.frexp(values)
+    mantissa = np.abs(m * _F24).astype(np.int64)
+    exponent = e.astype(np.int64)
+
+    # Adjust the exponent, and the mantissa in sympathy so it is
+    # a multiple of four, so it can be expressed in base 16
+    shift = -exponent % BITS_PER_NYBBLE
+    mantissa >>= shift
+    exponent += shift
+
+    exponent_16_biased = (exponent >> 2) + EXPONENT_BIAS
+
+    # Where the biased exponent is negative, we try to use a subnormal representation
+    shift_16 = np.maximum(-exponent_16_biased, 0)
+    exponent_16_biased += shift_16
+    mantissa >>= np.minimum(BITS_PER_NYBBLE * shift_16, MAX_BITS_PRECISION_IBM_FLOAT)
+    underflowed = (mantissa == 0) & ~is_zero
+    if np.any(underflowed):
+        raise FloatingPointError("IEEE Floating point value {} is smaller than the "
+                                 "smallest subnormal number for IBM floats.".format(values[underflowed][0]))
+
+    sign = (values < 0).astype(np.int64)
+    words = (sign << 31) | (exponent_16_biased << 24) | mantissa
+    words[is_zero] = 0
+    return words.astype('>u4')
@@ -0,0 +1,25 @@
+"""An IBM float packer extension using vectorised Numpy conversions."""
+
+import numpy as np
+
+from segpy.ibm_float_packer import PackerExtension
+
+from segpy_numpy.ibm_float import ibm2ieee_array, ieee2ibm_array
+
+
+class NumpyPacker(PackerExtension):
+    """IBM float un/packing which converts whole buffers at once with Numpy.
+    """
+    def pack(self, values):
+        if not isinstance(values, np.ndarray):
+            values = list(values)
+        return ieee2ibm_array(values).tobytes()
+
+    def unpack(self, data, num_items):
+        num_bytes = num_items * 4
+        data = memoryview(data).cast('B')
+        if len(data) < num_bytes:
+            raise ValueError("Cannot unpack {} IBM floats from {} bytes".format(num_items, len(data)))
+        # Return a list, like the other packers, rather than exposing a Numpy array to
+        # callers which expect a sequence with list semantics for ==, + and truthiness
+        return ibm2ieee_array(data[:num_bytes]).tolist()
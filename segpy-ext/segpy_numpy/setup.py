@@ -120,7 +120,10 @@ setup(
     # Declare entry-points to modules.
     entry_points={
         'console_scripts': [
-        ]
+        ],
+        'segpy.ibm_float_packer': [
+            'numpy = segpy_numpy.packer:NumpyPacker',
+        ],
     },
 )
 
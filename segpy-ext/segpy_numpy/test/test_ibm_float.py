@@ -0,0 +1,206 @@
+import unittest
+
+import numpy
+
+from segpy.ibm_float import (ibm2ieee, ieee2ibm, MAX_IBM_FLOAT, MIN_IBM_FLOAT,
+                             SMALLEST_POSITIVE_NORMAL_IBM_FLOAT)
+
+from segpy_numpy.ibm_float import ibm2ieee_array, ieee2ibm_array, ibm2bf16_array, ibm2int8_array
+
+IBM_BYTES = [
+    bytes((0x00, 0x00, 0x00, 0x00)),
+    bytes((0b11000000, 0x80, 0x00, 0x00)),
+    bytes((0b01000000, 0x80, 0x00, 0x00)),
+    bytes((0x41, 0x10, 0x00, 0x00)),
+    bytes((0b11000010, 0b01110110, 0b10100000, 0b00000000)),
+    bytes((0b01111111, 0b11111111, 0b11111111, 0b11111111)),
+    bytes((0b11111111, 0b11111111, 0b11111111, 0b11111111)),
+    bytes((0b00000000, 0b00010000, 0b00000000, 0b00000000)),
+    bytes((196, 74, 194, 143)),
+    bytes((191, 128, 0, 0)),
+    bytes((0x00, 0x00, 0x00, 0x20)),
+    bytes((0x00, 0x00, 0x00, 0x01)),
+    bytes((0x80, 0x00, 0x00, 0x00)),
+    bytes((0xb3, 0x00, 0x00, 0x00)),
+]
+
+
+class TestIbm2IeeeArray(unittest.TestCase):
+
+    def test_empty(self):
+        result = ibm2ieee_array(b'')
+        self.assertEqual(len(result), 0)
+
+    def test_agrees_with_scalar_conversion(self):
+        result = ibm2ieee_array(b''.join(IBM_BYTES))
+        for i, b in enumerate(IBM_BYTES):
+            self.assertEqual(result[i], ibm2ieee(b))
+
+    def test_agrees_bitwise_with_scalar_conversion(self):
+        result = ibm2ieee_array(b''.join(IBM_BYTES))
+        expected = numpy.array([ibm2ieee(b) for b in IBM_BYTES])
+        numpy.testing.assert_array_equal(result.view(numpy.uint64), expected.view(numpy.uint64))
+
+    def test_extremes(self):
+        result = ibm2ieee_array(b''.join(IBM_BYTES))
+        self.assertEqual(result[5], MAX_IBM_FLOAT)
+        self.assertEqual(result[6], MIN_IBM_FLOAT)
+
+    def test_uint8_array(self):
+        a = numpy.frombuffer(b''.join(IBM_BYTES), dtype=numpy.uint8).reshape(-1, 4)
+        result = ibm2ieee_array(a)
+        for i, b in enumerate(IBM_BYTES):
+            self.assertEqual(result[i], ibm2ieee(b))
+
+    def test_uint32_array(self):
+        words = numpy.array([int.from_bytes(b, 'big') for b in IBM_BYTES], dtype=numpy.uint32)
+        result = ibm2ieee_array(words)
+        for i, b in enumerate(IBM_BYTES):
+            self.assertEqual(result[i], ibm2ieee(b))
+
+    def test_partial_word_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ibm2ieee_array(b'\x41\x10\x00')
+
+    def test_output_array_is_filled_and_returned(self):
+        out = numpy.full(len(IBM_BYTES), numpy.nan)
+        result = ibm2ieee_array(b''.join(IBM_BYTES), out=out)
+        self.assertIs(result, out)
+        for i, b in enumerate(IBM_BYTES):
+            self.assertEqual(out[i], ibm2ieee(b))
+
+    def test_output_array_can_be_reused(self):
+        out = numpy.empty(len(IBM_BYTES))
+        ibm2ieee_array(b''.join(IBM_BYTES), out=out)
+        ibm2ieee_array(b''.join(reversed(IBM_BYTES)), out=out)
+        for i, b in enumerate(reversed(IBM_BYTES)):
+            self.assertEqual(out[i], ibm2ieee(b))
+
+    def test_output_array_of_wrong_size_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ibm2ieee_array(b''.join(IBM_BYTES), out=numpy.empty(len(IBM_BYTES) + 1))
+
+    def test_output_array_of_wrong_type_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ibm2ieee_array(b''.join(IBM_BYTES), out=numpy.empty(len(IBM_BYTES), dtype=numpy.float32))
+
+
+class TestIbm2IeeeArrayFloat32(unittest.TestCase):
+
+    def test_agrees_with_scalar_conversion(self):
+        result = ibm2ieee_array(b''.join(IBM_BYTES), dtype=numpy.float32)
+        self.assertEqual(result.dtype, numpy.float32)
+        with numpy.errstate(over='ignore'):
+            expected = numpy.array([ibm2ieee(b) for b in IBM_BYTES]).astype(numpy.float32)
+        numpy.testing.assert_array_equal(result, expected)
+
+    def test_out_of_range_values_are_infinite(self):
+        result = ibm2ieee_array(b''.join(IBM_BYTES), dtype=numpy.float32)
+        self.assertEqual(result[5], numpy.inf)
+        self.assertEqual(result[6], -numpy.inf)
+
+    def test_output_array_must_match_dtype(self):
+        with self.assertRaises(ValueError):
+            ibm2ieee_array(b''.join(IBM_BYTES), out=numpy.empty(len(IBM_BYTES)), dtype=numpy.float32)
+
+    def test_unsupported_dtype_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ibm2ieee_array(b''.join(IBM_BYTES), dtype=numpy.int32)
+
+
+class TestIbm2Bf16Array(unittest.TestCase):
+
+    def test_one(self):
+        result = ibm2bf16_array(bytes((0x41, 0x10, 0x00, 0x00)))
+        self.assertEqual(result.dtype, numpy.uint16)
+        self.assertEqual(result[0], 0x3f80)
+
+    def test_agrees_with_float32_conversion(self):
+        result = ibm2bf16_array(b''.join(IBM_BYTES))
+        float32_bits = ibm2ieee_array(b''.join(IBM_BYTES), dtype=numpy.float32).view(numpy.uint32)
+        numpy.testing.assert_array_equal(result, float32_bits >> 16)
+
+    def test_negative_zero(self):
+        result = ibm2bf16_array(bytes((0x80, 0x00, 0x00, 0x00)))
+        self.assertEqual(result[0], 0x0000)
+
+
+class TestIbm2Int8Array(unittest.TestCase):
+
+    def test_quantization(self):
+        values = [0.0, -0.5, 0.5, 1.0, -118.625, MAX_IBM_FLOAT, MIN_IBM_FLOAT, 2.75]
+        data = b''.join(ieee2ibm(f) for f in values)
+        result = ibm2int8_array(data, 1.0)
+        self.assertEqual(result.dtype, numpy.int8)
+        numpy.testing.assert_array_equal(result, [0, 0, 0, 1, -119, 127, -128, 3])
+
+    def test_scale(self):
+        values = [0.0, -0.5, 0.5, 1.0, 0.03125]
+        data = b''.join(ieee2ibm(f) for f in values)
+        result = ibm2int8_array(data, 64.0)
+        numpy.testing.assert_array_equal(result, [0, -32, 32, 64, 2])
+
+    def test_ties_round_to_even(self):
+        values = [0.5, 1.5, 2.5, -0.5, -2.5]
+        data = b''.join(ieee2ibm(f) for f in values)
+        result = ibm2int8_array(data, 1.0)
+        numpy.testing.assert_array_equal(result, [0, 2, 2, 0, -2])
+
+    def test_large_scale_saturates(self):
+        values = [0.0, 1.0, -1.0, SMALLEST_POSITIVE_NORMAL_IBM_FLOAT]
+        data = b''.join(ieee2ibm(f) for f in values)
+        result = ibm2int8_array(data, 1e300)
+        numpy.testing.assert_array_equal(result, [0, 127, -128, 127])
+
+    def test_non_finite_scale_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ibm2int8_array(ieee2ibm(1.0), float('inf'))
+
+
+class TestIeee2IbmArray(unittest.TestCase):
+
+    def test_empty(self):
+        result = ieee2ibm_array([])
+        self.assertEqual(len(result), 0)
+
+    def test_agrees_with_scalar_conversion(self):
+        values = [0.0, -0.5, 0.5, 1.0, -118.625, 0.1, MAX_IBM_FLOAT, MIN_IBM_FLOAT,
+                  1.6472184286297693e-83, 5.147557589468029e-85, -19138.55859375]
+        result = ieee2ibm_array(values)
+        for i, f in enumerate(values):
+            self.assertEqual(result[i:i+1].tobytes(), ieee2ibm(f))
+
+    def test_nan_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ieee2ibm_array([1.0, float('nan')])
+
+    def test_inf_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ieee2ibm_array([1.0, float('inf')])
+
+    def test_too_large_raises_overflow_error(self):
+        with self.assertRaises(OverflowError):
+            ieee2ibm_array([1.0, MAX_IBM_FLOAT * 10])
+
+    def test_too_small_raises_overflow_error(self):
+        with self.assertRaises(OverflowError):
+            ieee2ibm_array([1.0, MIN_IBM_FLOAT * 10])
+
+    def test_too_small_subnormal_raises_floating_point_error(self):
+        with self.assertRaises(FloatingPointError):
+            ieee2ibm_array([1.0, 1e-86])
+
+
+class TestBytesRoundtrip(unittest.TestCase):
+
+    def test_normalized_bytes_roundtrip(self):
+        for seed in range(4):
+            data = numpy.random.default_rng(seed).integers(0, 256, (100000, 4), dtype=numpy.uint8)
+            # Only normalized encodings survive the round trip, so ensure the leading nybble is non-zero
+            data[:, 1] |= 0x10
+            result = ieee2ibm_array(ibm2ieee_array(data))
+            numpy.testing.assert_array_equal(result, data.view('>u4').reshape(-1))
+
+
+if __name__ == '__main__':
+    unittest.main()
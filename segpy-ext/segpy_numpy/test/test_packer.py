@@ -0,0 +1,48 @@
+import unittest
+
+from segpy.ibm_float import ieee2ibm, MAX_IBM_FLOAT, MIN_IBM_FLOAT, IBMFloat
+
+from segpy_numpy.packer import NumpyPacker
+
+VALUES = [0.0, -0.5, 0.5, 1.0, -118.625, MAX_IBM_FLOAT, MIN_IBM_FLOAT, 5.147557589468029e-85]
+
+
+class TestNumpyPacker(unittest.TestCase):
+
+    def test_pack_empty(self):
+        self.assertEqual(NumpyPacker().pack([]), b'')
+
+    def test_unpack_empty(self):
+        self.assertEqual(len(NumpyPacker().unpack(b'', 0)), 0)
+
+    def test_pack(self):
+        packed = NumpyPacker().pack(iter(VALUES))
+        self.assertEqual(packed, b''.join(ieee2ibm(f) for f in VALUES))
+
+    def test_pack_ibm_floats(self):
+        packed = NumpyPacker().pack([IBMFloat.from_float(f) for f in VALUES])
+        self.assertEqual(packed, b''.join(ieee2ibm(f) for f in VALUES))
+
+    def test_unpack(self):
+        data = b''.join(ieee2ibm(f) for f in VALUES)
+        unpacked = NumpyPacker().unpack(data, len(VALUES))
+        self.assertEqual(unpacked, VALUES)
+
+    def test_unpack_returns_list(self):
+        data = b''.join(ieee2ibm(f) for f in VALUES)
+        unpacked = NumpyPacker().unpack(data, len(VALUES))
+        self.assertIsInstance(unpacked, list)
+
+    def test_unpack_too_few_bytes_raises_value_error(self):
+        data = b''.join(ieee2ibm(f) for f in VALUES)
+        with self.assertRaises(ValueError):
+            NumpyPacker().unpack(data[:-1], len(VALUES))
+
+    def test_unpack_fewer_items_than_available(self):
+        data = b''.join(ieee2ibm(f) for f in VALUES)
+        unpacked = NumpyPacker().unpack(data, 3)
+        self.assertEqual(list(unpacked), VALUES[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
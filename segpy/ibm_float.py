@@ -1,8 +1,7 @@
+import struct
 from math import frexp, isnan, isinf, trunc, floor, gcd
 from numbers import Real, Rational
 
-from segpy.util import four_bytes
-
 
 IBM_ZERO_BYTES = b'\x00\x00\x00\x00'
 IBM_NEGATIVE_ONE_BYTES = b'\xc1\x10\x00\x00'
@@ -27,27 +26,54 @@ EXPONENT_BIAS = 64
 MIN_EXACT_INTEGER_IBM_FLOAT = -2**MAX_BITS_PRECISION_IBM_FLOAT
 MAX_EXACT_INTEGER_IBM_FLOAT = 2**MIN_BITS_PRECISION_IBM_FLOAT
 
+# The 32-bit pattern of an IBM float as it is stored, big-endian
+_U32 = struct.Struct('>I')
+
+# Up to this difference in base-16 exponents, the exact sum of two 24-bit
+# mantissas needs no more than the 53 bits of precision of a 64-bit float
+_MAX_EXACT_ADDITION_EXPONENT_16_DIFFERENCE = 7
+
+# The value of a unit integer mantissa for each of the 128 biased base-16 exponents.
+# These are all exact powers of two, so scaling a mantissa by them is exact.
+_IBM_SCALE = tuple(pow(float(EXPONENT_BASE), i - EXPONENT_BIAS) / _F24 for i in range(128))
+
 
 def ibm2ieee(big_endian_bytes):
     """Interpret a byte string as a big-endian IBM float.
 
     Args:
-        big_endian_bytes (bytes): A byte-string containing at least four bytes.
+        big_endian_bytes (bytes): A byte-string containing at least four bytes,
+            or a sequence of at least four integer byte values.
 
     Returns:
         The floating point value.
+
+    Raises:
+        ValueError: If fewer than four bytes are supplied.
     """
-    a, b, c, d = four_bytes(big_endian_bytes)
+    try:
+        word = _U32.unpack_from(big_endian_bytes)[0]
+    except (TypeError, struct.error):
+        a, b, c, d = big_endian_bytes[:4]
+        word = (a << 24) | (b << 16) | (c << 8) | d
+    return ibm2ieee_u32(word)
 
-    if b == c == d == 0:
-        return 0.0
 
-    sign = -1 if (a & 0x80) else 1
-    exponent_16_biased = a & 0x7f
-    mantissa = ((b << 16) | (c << 8) | d) / _F24
+def ibm2ieee_u32(word):
+    """Interpret an unsigned 32-bit integer as the bit pattern of an IBM float.
 
-    value = sign * mantissa * pow(EXPONENT_BASE, exponent_16_biased - EXPONENT_BIAS)
-    return value
+    Args:
+        word (int): The IBM float bits, with the sign in the most significant bit.
+
+    Returns:
+        The floating point value.
+    """
+    mantissa = word & 0x00ffffff
+    if mantissa == 0:
+        return 0.0
+
+    value = mantissa * _IBM_SCALE[(word >> 24) & 0x7f]
+    return -value if (word & 0x80000000) else value
 
 
 BITS_PER_NYBBLE = 4
@@ -68,23 +94,31 @@ def ieee2ibm(f):
         ValueError: If f is NaN or infinite.
         FloatingPointError: If f cannot be represented without total loss of precision.
     """
-    if f == 0:
-        # There are many potential representations of zero - this is the standard one
-        return b'\x00\x00\x00\x00'
+    return _U32.pack(ieee2ibm_u32(f))
 
-    if isnan(f):
-        raise ValueError("NaN cannot be represented in IBM floating point")
 
-    if isinf(f):
-        raise ValueError("Infinities cannot be represented in IBM floating point")
+def ieee2ibm_u32(f):
+    """Convert a float to an unsigned 32-bit integer with the bit pattern of an IBM float.
 
-    if f < MIN_IBM_FLOAT:
-        raise OverflowError("IEEE Floating point value {} is less than the "
-                            "representable minimum for IBM floats.".format(f))
+    Args:
+        f (float): The value to be converted.
+
+    Returns:
+        An int in the range 0 to 2**32 - 1.
+
+    Raises:
+        OverflowError: If f is outside the representable range.
+        ValueError: If f is NaN or infinite.
+        FloatingPointError: If f cannot be represented without total loss of precision.
+    """
+    if f == 0:
+        # There are many potential representations of zero - this is the standard one
+        return 0
 
-    if f > MAX_IBM_FLOAT:
-        raise OverflowError("IEEE Floating point value {} is greater than the "
-                            "representable maximum for IBM floats".format(f))
+    # NaN and the infinities are also outside this range, so a single test
+    # admits every representable value
+    if not (MIN_IBM_FLOAT <= f <= MAX_IBM_FLOAT):
+        _raise_unrepresentable(f)
 
     # Now compute m and e to satisfy:
     #
@@ -98,9 +132,9 @@ def ieee2ibm(f):
     # Convert the fraction (m) into an integer representation. IEEE float32
     # numbers have 23 explicit (24 implicit) bits of precision.
 
-    mantissa = abs(int(m * _L24))
+    mantissa = int(abs(m) * _L24)
     exponent = e
-    sign = 0x80 if f < 0 else 0x00
+    sign = (m < 0) << 31
 
     # IBM single precision floats are of the form
     # (-1)^sign * 0.significand * 16^(exponent-64)
@@ -125,32 +159,51 @@ def ieee2ibm(f):
             raise FloatingPointError("IEEE Floating point value {} is smaller than the "
                                      "smallest subnormal number for IBM floats.".format(f))
 
-    a = sign | exponent_16_biased
-    b = (mantissa >> 16) & 0xff
-    c = (mantissa >> 8) & 0xff
-    d = mantissa & 0xff
+    return sign | (exponent_16_biased << 24) | mantissa
 
-    return bytes((a, b, c, d))
+
+def _raise_unrepresentable(f):
+    if isnan(f):
+        raise ValueError("NaN cannot be represented in IBM floating point")
+
+    if isinf(f):
+        raise ValueError("Infinities cannot be represented in IBM floating point")
+
+    if f < MIN_IBM_FLOAT:
+        raise OverflowError("IEEE Floating point value {} is less than the "
+                            "representable minimum for IBM floats.".format(f))
+
+    raise OverflowError("IEEE Floating point value {} is greater than the "
+                        "representable maximum for IBM floats".format(f))
 
 
 class IBMFloat(Real):
 
-    __slots__ = ['_data']
+    __slots__ = ['_u32']
 
     def __new__(cls, b):
-        obj = object.__new__(cls)
-
         data = bytes(b)
         num_bytes = len(data)
         if num_bytes != 4:
             raise ValueError("{} cannot be constructed from {} values".format(cls.__name__, num_bytes))
-        obj._data = data
+        return cls._from_u32(_U32.unpack(data)[0])
+
+    @classmethod
+    def _from_u32(cls, word):
+        # The whole representation is the 32-bit pattern of the IBM float, from which
+        # the sign, exponent and mantissa fields are masked out on demand.
+        obj = object.__new__(cls)
+        obj._u32 = word
         return obj
 
     @classmethod
     def from_float(cls, f):
         """Construct an IBMFloat from an IEEE float.
 
+        The result is normalized, unless f is so small that it can only be
+        represented as a subnormal, so there is no need to call normalize()
+        on it.
+
         Args:
             f (float): The value to be converted.
 
@@ -164,7 +217,7 @@ class IBMFloat(Real):
         """
         if isinstance(f, IBMFloat):
             return f
-        return cls(ieee2ibm(f))
+        return cls._from_u32(ieee2ibm_u32(f))
 
     @classmethod
     def from_float_without_underflow(cls, f):
@@ -183,11 +236,11 @@ class IBMFloat(Real):
             ValueError: If f is NaN or infinite.
         """
         try:
-            buffer = ieee2ibm(f)
+            word = ieee2ibm_u32(f)
         except FloatingPointError:  # Underflow
             return IBM_FLOAT_ZERO
         else:
-            return cls(buffer)
+            return cls._from_u32(word)
 
     @classmethod
     def from_real(cls, f):
@@ -197,6 +250,24 @@ class IBMFloat(Real):
     def from_bytes(cls, b):
         return cls(b)
 
+    @classmethod
+    def from_u32(cls, word):
+        """Construct an IBMFloat from the bit pattern of an IBM float.
+
+        Args:
+            word (int): An unsigned 32-bit integer, with the sign in the most significant bit.
+
+        Returns:
+            An IBMFloat.
+
+        Raises:
+            ValueError: If word is not in the range 0 to 2**32 - 1.
+        """
+        if not (0 <= word <= 0xffffffff):
+            raise ValueError("{} cannot be constructed from {!r} which is not an unsigned 32-bit integer"
+                             .format(cls.__name__, word))
+        return cls._from_u32(word)
+
     @classmethod
     def ldexp(cls, fraction, exponent):
         """Make an IBMFloat from fraction and exponent.
@@ -219,18 +290,18 @@ class IBMFloat(Real):
     @property
     def signbit(self):
         """True if the value is negative, otherwise False."""
-        return bool(self._data[0] & 0x80)
+        return bool(self._u32 & 0x80000000)
 
     def __float__(self):
-        return ibm2ieee(self._data)
+        return ibm2ieee_u32(self._u32)
 
     def __bytes__(self):
-        return self._data
+        return _U32.pack(self._u32)
 
     def __repr__(self):
         return "{}(bytes([{}])) ≈ {!r}".format(
             self.__class__.__name__,
-            ', '.join('0x{:02x}'.format(b) for b in self._data),
+            ', '.join('0x{:02x}'.format(b) for b in bytes(self)),
             float(self))
 
     def __str__(self):
@@ -245,9 +316,9 @@ class IBMFloat(Real):
     def is_subnormal(self):
         if self.is_zero():
             # Only one of the many possible representations of zero is considered 'normal' - all the zeros
-            return not all(b == 0 for b in self._data)
+            return self._u32 != 0
 
-        return self._data[1] < 16
+        return (self._u32 & 0x00f00000) == 0
 
     def zero_subnormal(self):
         return IBM_FLOAT_ZERO if self.is_subnormal() else self
@@ -285,21 +356,13 @@ class IBMFloat(Real):
         if self.is_zero():
             return IBM_FLOAT_ZERO
 
-        data = self._data
-        return IBMFloat((data[0] ^ 0b10000000,
-                         data[1],
-                         data[2],
-                         data[3]))
+        return IBMFloat._from_u32(self._u32 ^ 0x80000000)
 
     def __abs__(self):
         if self.is_zero():
             return IBM_FLOAT_ZERO
 
-        data = self._data
-        return IBMFloat((data[0] & 0b01111111,
-                         data[1],
-                         data[2],
-                         data[3]))
+        return IBMFloat._from_u32(self._u32 & 0x7fffffff)
 
     def __eq__(self, rhs):
         lhs = self
@@ -321,7 +384,7 @@ class IBMFloat(Real):
         if not isinstance(rhs, IBMFloat):
             return NotImplemented
 
-        if lhs._data == rhs._data:
+        if lhs._u32 == rhs._u32:
             return True
 
         lhs_sign = lhs.signbit
@@ -330,58 +393,24 @@ class IBMFloat(Real):
         if lhs_sign != rhs_sign:
             return False
 
-        nlhs = lhs.try_normalize()
-        nrhs = rhs.try_normalize()
-
-        if not (nlhs.is_subnormal() or nrhs.is_subnormal()):
-            # Both of the numbers are normalised
-            return nlhs._data == nrhs._data
-
-        # Either or both of the numbers are subnormal
-        lhs_exp16 = nlhs.exp16
-        rhs_exp16 = nrhs.exp16
-
-        lhs_mantissa = nlhs.int_mantissa
-        rhs_mantissa = nrhs.int_mantissa
-
-        if lhs_exp16 < rhs_exp16:
-            delta_exp16 = rhs_exp16 - lhs_exp16
-            lhs_mantissa >>= 4 * delta_exp16
-            lhs_exp16 += delta_exp16
-
-        if lhs_exp16 > rhs_exp16:
-            delta_exp16 = lhs_exp16 - rhs_exp16
-            rhs_mantissa >>= 4 * delta_exp16
-            rhs_exp16 += delta_exp16
-
-        assert lhs_exp16 == rhs_exp16
-        return lhs_mantissa == rhs_mantissa
+        # Normalized as far as the exponent range allows, each value has a
+        # unique representation, so no intermediate IBMFloats are needed
+        return _normalize_u32(lhs._u32) == _normalize_u32(rhs._u32)
 
     @property
     def exp16(self):
         """The base 16 exponent."""
-        exponent_16_biased = self._data[0] & 0x7f
+        exponent_16_biased = (self._u32 >> 24) & 0x7f
         exponent_16 = exponent_16_biased - EXPONENT_BIAS
         return exponent_16
 
     @property
     def int_mantissa(self):
-        data = self._data
-        return (data[1] << 16) | (data[2] << 8) | data[3]
+        return self._u32 & 0x00ffffff
 
     def __trunc__(self):
-        sign = -1 if self.signbit else 1
-        exponent_16 = self.exp16
-        mantissa = self.int_mantissa
-
-        num_nybbles_to_preserve = min(exponent_16, MAX_BITS_PRECISION_IBM_FLOAT // BITS_PER_NYBBLE)
-        num_bits_to_clear = MAX_BITS_PRECISION_IBM_FLOAT - num_nybbles_to_preserve * BITS_PER_NYBBLE
-        clear_mask = 2**num_bits_to_clear - 1
-        preserve_mask = (2**MAX_BITS_PRECISION_IBM_FLOAT - 1) & ~clear_mask
-
-        truncated_mantissa = mantissa & preserve_mask
-        magnitude = int(truncated_mantissa * pow(EXPONENT_BASE, exponent_16)) >> MAX_BITS_PRECISION_IBM_FLOAT
-        return sign * magnitude
+        magnitude, _ = _trunc_u32(self._u32)
+        return -magnitude if self.signbit else magnitude
 
     def normalize(self):
         """Normalize the floating point representation.
@@ -392,30 +421,14 @@ class IBMFloat(Real):
         Raises:
             FloatingPointError: If the number could not be normalized.
         """
-        if self.is_zero():
+        word = _normalize_u32(self._u32)
+        if word == 0:
             return IBM_FLOAT_ZERO
 
-        exponent_16 = self.exp16
-        mantissa = self.int_mantissa
-
-        while mantissa < (1 << 20):
-            new_exponent_16 = exponent_16 - 1
-            if not (-64 <= new_exponent_16 < 64):
-                raise FloatingPointError("Could not normalize {!r} without causing exponent overflow.".format(self))
+        if (word & 0x00f00000) == 0:
+            raise FloatingPointError("Could not normalize {!r} without causing exponent overflow.".format(self))
 
-            mantissa <<= 4
-            exponent_16 = new_exponent_16
-
-        exponent_16_biased = exponent_16 + EXPONENT_BIAS
-
-        sign = int(self.signbit) << 7
-
-        a = sign | exponent_16_biased
-        b = (mantissa >> 16) & 0xff
-        c = (mantissa >> 8) & 0xff
-        d = mantissa & 0xff
-
-        return IBMFloat.from_bytes((a, b, c, d))
+        return IBMFloat._from_u32(word)
 
     def try_normalize(self):
         """Normalize if possible.
@@ -423,11 +436,15 @@ class IBMFloat(Real):
         If it is not possible to normalize the representation,
         it remains unmodified.
         """
-        try:
-            return self.normalize()
-        except FloatingPointError:
+        word = _normalize_u32(self._u32)
+        if word == 0:
+            return IBM_FLOAT_ZERO
+
+        if (word & 0x00f00000) == 0:
             return self
 
+        return IBMFloat._from_u32(word)
+
     def __floordiv__(self, rhs):
         return floor(float(self) / float(rhs))
 
@@ -488,10 +505,12 @@ class IBMFloat(Real):
         return IBMFloat.from_float(p) if isinstance(lhs, IBMFloat) else p
 
     def __add__(self, rhs):
+        if isinstance(rhs, IBMFloat):
+            return self._add_word(rhs._u32)
+
         # Python's 64-bit float has much more precision than this
         # 32-bit IBM float and is much faster, so delegate
-        p = float(self) + float(rhs)
-        return IBMFloat.from_float_without_underflow(p) if isinstance(rhs, IBMFloat) else p
+        return float(self) + float(rhs)
 
     def __radd__(self, lhs):
         # Python's 64-bit float has much more precision than this
@@ -499,10 +518,32 @@ class IBMFloat(Real):
         return float(lhs) + float(self)
 
     def __sub__(self, rhs):
+        if isinstance(rhs, IBMFloat):
+            return self._add_word(rhs._u32 ^ 0x80000000)
+
         # Python's 64-bit float has much more precision than this
         # 32-bit IBM float and is much faster, so delegate
-        p = float(self) - float(rhs)
-        return IBMFloat.from_float_without_underflow(p) if isinstance(rhs, IBMFloat) else p
+        return float(self) - float(rhs)
+
+    def _add_word(self, rhs_word):
+        """Add the IBM float with bit pattern rhs_word to this one.
+
+        Where possible, the sum is computed exactly in integer arithmetic and
+        then truncated towards zero, giving the same result as converting the
+        sum of the two values as 64-bit floats with from_float_without_underflow().
+
+        Returns:
+            An IBMFloat.
+
+        Raises:
+            OverflowError: If the sum is outside the representable range.
+        """
+        word = _add_u32(self._u32, rhs_word)
+        if word is None:
+            # Python's 64-bit float rounds widely separated operands, and reports
+            # overflow, just as the result of any other float calculation
+            return IBMFloat.from_float_without_underflow(float(self) + ibm2ieee_u32(rhs_word))
+        return IBMFloat._from_u32(word) if word != 0 else IBM_FLOAT_ZERO
 
     def __rsub__(self, lhs):
         # Python's 64-bit float has much more precision than this
@@ -530,12 +571,12 @@ class IBMFloat(Real):
         return float(self) >= float(rhs)
 
     def __ceil__(self):
-        t = trunc(self)
-        return t if self.signbit else t + 1
+        magnitude, inexact = _trunc_u32(self._u32)
+        return -magnitude if self.signbit else magnitude + inexact
 
     def __floor__(self):
-        t = trunc(self)
-        return t - 1 if self.signbit else t
+        magnitude, inexact = _trunc_u32(self._u32)
+        return -magnitude - inexact if self.signbit else magnitude
 
     def __round__(self, ndigits=None):
         # Python's 64-bit float has much more precision than this
@@ -546,4 +587,100 @@ class IBMFloat(Real):
         return trunc(self)
 
 
+def _normalize_u32(word):
+    """Normalize the bit pattern of an IBM float as far as the exponent range allows.
+
+    Args:
+        word (int): The IBM float bits, with the sign in the most significant bit.
+
+    Returns:
+        The bit pattern of an equal IBM float with as many leading zero nybbles
+        removed from its mantissa as the minimum exponent permits. All zeros
+        are normalized to the standard positive zero.
+    """
+    mantissa = word & 0x00ffffff
+    if mantissa == 0:
+        return 0
+
+    # Count the leading zero nybbles of the 24-bit mantissa, and remove
+    # them all with a single shift balanced by a single exponent change
+    exponent_16_biased = (word >> 24) & 0x7f
+    num_leading_zero_nybbles = (MAX_BITS_PRECISION_IBM_FLOAT - mantissa.bit_length()) // BITS_PER_NYBBLE
+    shift_16 = min(num_leading_zero_nybbles, exponent_16_biased)
+
+    return ((word & 0x80000000)
+            | ((exponent_16_biased - shift_16) << 24)
+            | (mantissa << (BITS_PER_NYBBLE * shift_16)))
+
+
+def _trunc_u32(word):
+    """Truncate the magnitude of an IBM float to an integer.
+
+    Args:
+        word (int): The IBM float bits.
+
+    Returns:
+        A 2-tuple containing the integer part of the magnitude, and 1 if any
+        fractional part was discarded, otherwise 0.
+    """
+    mantissa = word & 0x00ffffff
+    # The binary exponent of the least significant bit of the mantissa
+    exponent = BITS_PER_NYBBLE * (((word >> 24) & 0x7f) - EXPONENT_BIAS) - MAX_BITS_PRECISION_IBM_FLOAT
+    if exponent >= 0:
+        return mantissa << exponent, 0
+    return mantissa >> -exponent, int(mantissa & ((1 << -exponent) - 1) != 0)
+
+
+def _add_u32(lhs_word, rhs_word):
+    """Add the bit patterns of two IBM floats.
+
+    Args:
+        lhs_word (int): The IBM float bits of the left-hand operand.
+        rhs_word (int): The IBM float bits of the right-hand operand.
+
+    Returns:
+        The normalized IBM float bits of the sum truncated towards zero, or None
+        if the exponents of the operands are so far apart that a 64-bit float
+        could not hold their exact sum, or if the sum is too large to be
+        represented. The sum cannot underflow, because it is exactly
+        representable with the smaller of the two exponents.
+    """
+    lhs_exponent_16_biased = (lhs_word >> 24) & 0x7f
+    rhs_exponent_16_biased = (rhs_word >> 24) & 0x7f
+    if abs(lhs_exponent_16_biased - rhs_exponent_16_biased) > _MAX_EXACT_ADDITION_EXPONENT_16_DIFFERENCE:
+        return None
+    lhs_mantissa = lhs_word & 0x00ffffff
+    rhs_mantissa = rhs_word & 0x00ffffff
+    if lhs_word & 0x80000000:
+        lhs_mantissa = -lhs_mantissa
+    if rhs_word & 0x80000000:
+        rhs_mantissa = -rhs_mantissa
+
+    # Align the operands on the smaller exponent by shifting the other operand
+    # left, so that the sum is exact
+    exponent_16_biased = min(lhs_exponent_16_biased, rhs_exponent_16_biased)
+    total = ((lhs_mantissa << (BITS_PER_NYBBLE * (lhs_exponent_16_biased - exponent_16_biased)))
+             + (rhs_mantissa << (BITS_PER_NYBBLE * (rhs_exponent_16_biased - exponent_16_biased))))
+    if total == 0:
+        return 0
+
+    sign = 0x80000000 if total < 0 else 0
+    magnitude = abs(total)
+
+    # Shift by whole nybbles so the magnitude fits in the 24-bit mantissa with a
+    # non-zero leading nybble, or as nearly so as the minimum exponent allows
+    shift_16 = (magnitude.bit_length() - MAX_BITS_PRECISION_IBM_FLOAT + BITS_PER_NYBBLE - 1) // BITS_PER_NYBBLE
+    shift_16 = max(shift_16, -exponent_16_biased)
+    exponent_16_biased += shift_16
+    if exponent_16_biased > 0x7f:
+        return None
+
+    if shift_16 >= 0:
+        magnitude >>= BITS_PER_NYBBLE * shift_16
+    else:
+        magnitude <<= BITS_PER_NYBBLE * -shift_16
+
+    return sign | (exponent_16_biased << 24) | magnitude
+
+
 IBM_FLOAT_ZERO = IBMFloat.from_bytes(IBM_ZERO_BYTES)
@@ -2,11 +2,13 @@
 floats.
 
 The main job of this module is to select the correct implementation of the
-un/packing routines. The default version is written in pure Python, but if the
-faster C++ implementation is detected then it will be used.
+un/packing routines. The default version is written in pure Python, but if a
+faster implementation is detected then it will be used. The C++ implementation
+is preferred, followed by the Numpy implementation from segpy_numpy.
 """
 
 import abc
+import struct
 from stevedore.extension import ExtensionManager
 
 from segpy.ibm_float import IBMFloat
@@ -53,8 +55,11 @@ class Packer(PackerExtension):
                                       for value in values)
 
     def unpack(self, data, num_items):
-        return [IBMFloat.from_bytes(data[i: i+4])
-                for i in range(0, num_items * 4, 4)]
+        if len(data) < num_items * 4:
+            raise ValueError("Cannot unpack {} IBM floats from {} bytes".format(num_items, len(data)))
+        words = struct.unpack_from('>{}I'.format(num_items), data)
+        # Unpacking guarantees each word is an unsigned 32-bit integer
+        return [IBMFloat._from_u32(word) for word in words]
 
 
 _EXTENSION_MANAGER = ExtensionManager(
@@ -62,20 +67,26 @@ _EXTENSION_MANAGER = ExtensionManager(
     invoke_on_load=True)
 
 
+# Names of packer extensions in order of preference.
+_PREFERRED_EXTENSION_NAMES = ('cpp', 'numpy')
+
+
 # Boolean controller whether the Python implementation of IBM floating points
 # numbers will be required. If this is True, then the Python implementation
-# will always be used. If it is False (default) then the C++ implementation
-# will be used if it's available.
+# will always be used. If it is False (default) then the C++ or Numpy
+# implementation will be used if either is available.
 #
 # This is primarily for testing purposes.
 force_python_ibm_floats = False
 
 
 def _active_packer():
-    if force_python_ibm_floats or 'cpp' not in _EXTENSION_MANAGER:
-        return Packer()
+    if not force_python_ibm_floats:
+        for name in _PREFERRED_EXTENSION_NAMES:
+            if name in _EXTENSION_MANAGER:
+                return _EXTENSION_MANAGER[name].obj
 
-    return _EXTENSION_MANAGER['cpp'].obj
+    return Packer()
 
 
 def unpack_ibm_floats(data, num_items):
@@ -86,7 +97,9 @@ def unpack_ibm_floats(data, num_items):
         num_items: The number of floats to be read.
 
     Returns:
-        A sequence of floats.
+        A sequence of floats. The pure Python and Numpy implementations both
+        return a list, of IBMFloat and built-in float items respectively, and
+        raise ValueError if data contains fewer than num_items floats.
     """
 
     return _active_packer().unpack(data, num_items)
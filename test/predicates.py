@@ -1,3 +1,7 @@
+from itertools import repeat
+
+from segpy.util import almost_equal
+
 OPEN = {
     '{': '}',
     '[': ']',
@@ -43,3 +47,18 @@ def check_balanced(s):
                 s)
         )
     return True
+
+
+def all_almost_equal(xs, ys, epsilon):
+    """Check that corresponding items of two series are almost equal.
+
+    Args:
+        xs: A sequence of numbers.
+        ys: A sequence of numbers the same length as xs.
+        epsilon: The relative tolerance used by segpy.util.almost_equal().
+
+    Returns:
+        True if the sequences are of the same length and each pair of corresponding
+        items is almost equal, otherwise False.
+    """
+    return len(xs) == len(ys) and all(map(almost_equal, xs, ys, repeat(epsilon)))
@@ -1,3 +1,4 @@
+import functools
 import math
 from fractions import Fraction
 from math import trunc
@@ -5,12 +6,14 @@ import pytest
 
 from hypothesis import given, assume, settings, HealthCheck, Phase
 from hypothesis.errors import UnsatisfiedAssumption
-from hypothesis.strategies import integers, floats, one_of, just, composite
+from hypothesis.strategies import integers, floats, one_of, just, composite, binary
 from pytest import raises
 
-from segpy.ibm_float import (ieee2ibm, ibm2ieee, MAX_IBM_FLOAT, SMALLEST_POSITIVE_NORMAL_IBM_FLOAT,
-                             LARGEST_NEGATIVE_NORMAL_IBM_FLOAT, MIN_IBM_FLOAT, IBMFloat, EPSILON_IBM_FLOAT,
-                             MAX_EXACT_INTEGER_IBM_FLOAT, MIN_EXACT_INTEGER_IBM_FLOAT, EXPONENT_BIAS, _L21)
+from segpy.ibm_float import (ieee2ibm, ibm2ieee, ieee2ibm_u32, ibm2ieee_u32, MAX_IBM_FLOAT,
+                             SMALLEST_POSITIVE_NORMAL_IBM_FLOAT, LARGEST_NEGATIVE_NORMAL_IBM_FLOAT,
+                             MIN_IBM_FLOAT, IBMFloat, EPSILON_IBM_FLOAT, IBM_ZERO_BYTES,
+                             MAX_EXACT_INTEGER_IBM_FLOAT, MIN_EXACT_INTEGER_IBM_FLOAT, EXPONENT_BIAS, _L21,
+                             _add_u32)
 
 from segpy.util import almost_equal
 from test.predicates import check_balanced
@@ -40,6 +43,7 @@ def ibm_compatible_non_positive_floats(draw):
         floats(MIN_IBM_FLOAT, LARGEST_NEGATIVE_NORMAL_IBM_FLOAT)))
 
 
+@functools.lru_cache(maxsize=None)
 @composite
 def ibm_compatible_floats(draw, min_value=None, max_value=None):
     if min_value is None:
@@ -68,11 +72,59 @@ def ibm_compatible_floats(draw, min_value=None, max_value=None):
     return ibm
 
 
+# The position of the exponent field within the 32-bit pattern of an IBM float
+_EXPONENT_OFFSET = 24
+_EXPONENT_WIDTH = 7
+
+
+def _extract(word, offset, width):
+    """Extract the unsigned bit field of width bits starting at bit offset of word."""
+    return (word >> offset) & ((1 << width) - 1)
+
+
+def _insert(word, value, offset, width):
+    """Replace the bit field of width bits starting at bit offset of word with value."""
+    mask = ((1 << width) - 1) << offset
+    return (word & ~mask) | ((value << offset) & mask)
+
+
+class TestBitFields:
+
+    @given(integers(0, 0xffffffff), integers(0, 31), integers(1, 32))
+    def test_extract_inserted(self, word, offset, width):
+        value = _extract(word, 0, width)
+        assert _extract(_insert(word, value, offset, width), offset, width) == value
+
+    @given(integers(0, 0xffffffff), integers(0, 31), integers(1, 32))
+    def test_insert_extracted(self, word, offset, width):
+        assert _insert(word, _extract(word, offset, width), offset, width) == word
+
+    def test_extract_exponent(self):
+        assert _extract(0xc276a000, _EXPONENT_OFFSET, _EXPONENT_WIDTH) == 0x42
+
+    def test_insert_exponent_preserves_sign_and_mantissa(self):
+        assert _insert(0xc276a000, 0x41, _EXPONENT_OFFSET, _EXPONENT_WIDTH) == 0xc176a000
+
+
 class TestIbm2Ieee:
 
     @given(integers(0, 255))
     def test_zero(self, a):
-        assert ibm2ieee(bytes([a, 0, 0, 0])) == 0.0
+        assert ibm2ieee_u32(a << 24) == 0.0
+
+    @given(integers(0, 255))
+    def test_zero_bytes(self, a):
+        assert ibm2ieee(bytes((a, 0, 0, 0))) == 0.0
+
+    @given(integers(0, 0xffffffff))
+    def test_u32_agrees_with_bytes(self, word):
+        assert ibm2ieee_u32(word) == ibm2ieee(word.to_bytes(4, 'big'))
+
+    def test_u32_one(self):
+        assert ibm2ieee_u32(0x41100000) == 1.0
+
+    def test_u32_negative_118_625(self):
+        assert ibm2ieee_u32(0xc276a000) == -118.625
 
     def test_positive_half(self):
         assert ibm2ieee(bytes((0b11000000, 0x80, 0x00, 0x00))) == -0.5
@@ -114,12 +166,32 @@ class TestIbm2Ieee:
     def test_subnormal_smallest_subnormal(self):
         assert ibm2ieee(bytes((0x00, 0x00, 0x00, 0x01))) == 5.147557589468029e-85
 
+    def test_sequence_of_integers(self):
+        assert ibm2ieee((0x41, 0x10, 0x00, 0x00)) == 1.0
+
+    def test_too_few_bytes_raises_value_error(self):
+        with raises(ValueError):
+            ibm2ieee(b'\x41\x10\x00')
+
 
 class TestIeee2Ibm:
 
     def test_zero(self):
         assert ieee2ibm(0.0) == b'\0\0\0\0'
 
+    def test_u32_zero(self):
+        assert ieee2ibm_u32(0.0) == 0
+
+    def test_u32_one(self):
+        assert ieee2ibm_u32(1.0) == 0x41100000
+
+    def test_u32_negative_118_625(self):
+        assert ieee2ibm_u32(-118.625) == 0xc276a000
+
+    @given(ibm_compatible_floats())
+    def test_u32_agrees_with_bytes(self, f):
+        assert ieee2ibm_u32(f).to_bytes(4, 'big') == ieee2ibm(f)
+
     def test_positive_half(self):
         assert ieee2ibm(-0.5) == bytes((0b11000000, 0x80, 0x00, 0x00))
 
@@ -222,6 +294,19 @@ class TestIBMFloat:
         with raises(ValueError):
             IBMFloat.from_bytes(b'\x00\x00\x00')
 
+    def test_zero_from_u32(self):
+        zero = IBMFloat.from_u32(0)
+        assert zero.is_zero()
+
+    @given(integers(0, 0xffffffff))
+    def test_u32_matches_bytes(self, word):
+        assert bytes(IBMFloat.from_u32(word)) == word.to_bytes(4, 'big')
+
+    @given(one_of(integers(max_value=-1), integers(min_value=2**32)))
+    def test_out_of_range_u32_raises_value_error(self, word):
+        with raises(ValueError):
+            IBMFloat.from_u32(word)
+
     def test_subnormal(self):
         ibm = IBMFloat.from_float(1.6472184286297693e-83)
         assert ibm.is_subnormal()
@@ -254,12 +339,8 @@ class TestIBMFloat:
     def test_bool(self, f):
         assert bool(IBMFloat.from_float(f)) == bool(f)
 
-    @given(integers(0, 255),
-           integers(0, 255),
-           integers(0, 255),
-           integers(0, 255))
-    def test_bytes_roundtrip(self, a, b, c, d):
-        b = bytes((a, b, c, d))
+    @given(binary(min_size=4, max_size=4))
+    def test_bytes_roundtrip(self, b):
         ibm = IBMFloat.from_bytes(b)
         assert bytes(ibm) == b
 
@@ -269,17 +350,15 @@ class TestIBMFloat:
         assert almost_equal(f, float(ibm), epsilon=EPSILON_IBM_FLOAT)
 
     @given(integers(0, MAX_EXACT_INTEGER_IBM_FLOAT - 1),
-           ibm_compatible_floats(0.0, 1.0))
+           ibm_compatible_floats(0.0, 1 - EPSILON_IBM_FLOAT))
     def test_trunc_above_zero(self, i, f):
-        assume(f != 1.0)
         ieee = i + f
         ibm = IBMFloat.from_float(ieee)
         assert trunc(ibm) == i
 
     @given(integers(MIN_EXACT_INTEGER_IBM_FLOAT + 1, 0),
-           ibm_compatible_floats(0.0, 1.0))
+           ibm_compatible_floats(0.0, 1 - EPSILON_IBM_FLOAT))
     def test_trunc_below_zero(self, i, f):
-        assume(f != 1.0)
         ieee = i - f
         ibm = IBMFloat.from_float(ieee)
         assert trunc(ibm) == i
@@ -289,13 +368,25 @@ class TestIBMFloat:
     def test_ceil(self, i, f):
         ieee = i + f
         ibm = IBMFloat.from_float(ieee)
-        assert math.ceil(ibm) == i + 1
+        # Near the limits of precision, the fractional part may be truncated away
+        assert math.ceil(ibm) == math.ceil(float(ibm))
+
+    @given(integers(MIN_EXACT_INTEGER_IBM_FLOAT, MAX_EXACT_INTEGER_IBM_FLOAT))
+    def test_ceil_integer(self, i):
+        ibm = IBMFloat.from_float(i)
+        assert math.ceil(ibm) == i
 
     @given(integers(MIN_EXACT_INTEGER_IBM_FLOAT, MAX_EXACT_INTEGER_IBM_FLOAT - 1),
            ibm_compatible_floats(EPSILON_IBM_FLOAT, 1 - EPSILON_IBM_FLOAT))
     def test_floor(self, i, f):
         ieee = i + f
         ibm = IBMFloat.from_float(ieee)
+        # Near the limits of precision, the fractional part may be truncated away
+        assert math.floor(ibm) == math.floor(float(ibm))
+
+    @given(integers(MIN_EXACT_INTEGER_IBM_FLOAT, MAX_EXACT_INTEGER_IBM_FLOAT))
+    def test_floor_integer(self, i):
+        ibm = IBMFloat.from_float(i)
         assert math.floor(ibm) == i
 
     def test_normalize_zero(self):
@@ -323,61 +414,51 @@ class TestIBMFloat:
         normalized = ibm.normalize()
         assert not normalized.is_subnormal()
 
-    @given(integers(128, 255),
-           integers(0, 255),
-           integers(0, 255),
+    def test_normalise_subnormal_preserves_value(self):
+        ibm = IBMFloat.from_bytes((0b11000110, 0x00, 0x00, 0x01))
+        normalized = ibm.normalize()
+        assert bytes(normalized) == bytes((0b11000001, 0x10, 0x00, 0x00))
+        assert float(normalized) == float(ibm)
+
+    @given(binary(min_size=3, max_size=3),
            integers(4, 23))
-    def test_normalise_subnormal(self, b, c, d, shift):
-        mantissa = (b << 16) | (c << 8) | d
-        assume(mantissa != 0)
+    def test_normalise_subnormal(self, b, shift):
+        mantissa = int.from_bytes(b, 'big') | 0x800000
         mantissa >>= shift
         assert mantissa != 0
 
-        sa = EXPONENT_BIAS
-        sb = (mantissa >> 16) & 0xff
-        sc = (mantissa >> 8) & 0xff
-        sd = mantissa & 0xff
-
-        ibm = IBMFloat.from_bytes((sa, sb, sc, sd))
+        word = _insert(mantissa, EXPONENT_BIAS, _EXPONENT_OFFSET, _EXPONENT_WIDTH)
+        ibm = IBMFloat.from_u32(word)
         assert ibm.is_subnormal()
         normalized = ibm.normalize()
         assert not normalized.is_subnormal()
 
-    @given(integers(128, 255),
-           integers(0, 255),
-           integers(0, 255),
+    @given(binary(min_size=3, max_size=3),
            integers(4, 23))
-    def test_zero_subnormal(self, b, c, d, shift):
-        mantissa = (b << 16) | (c << 8) | d
-        assume(mantissa != 0)
+    def test_zero_subnormal(self, b, shift):
+        mantissa = int.from_bytes(b, 'big') | 0x800000
         mantissa >>= shift
         assert mantissa != 0
 
-        sa = EXPONENT_BIAS
-        sb = (mantissa >> 16) & 0xff
-        sc = (mantissa >> 8) & 0xff
-        sd = mantissa & 0xff
-
-        ibm = IBMFloat.from_bytes((sa, sb, sc, sd))
+        word = _insert(mantissa, EXPONENT_BIAS, _EXPONENT_OFFSET, _EXPONENT_WIDTH)
+        ibm = IBMFloat.from_u32(word)
         assert ibm.is_subnormal()
         z = ibm.zero_subnormal()
         assert z.is_zero()
 
-    @given(integers(0, 255),
-           integers(0, 255),
-           integers(0, 255),
-           integers(0, 255))
-    def test_abs(self, a, b, c, d):
-        ibm = IBMFloat.from_bytes((a, b, c, d))
+    @given(binary(min_size=4, max_size=4))
+    def test_abs(self, b):
+        ibm = IBMFloat.from_bytes(b)
         abs_ibm = abs(ibm)
         assert abs_ibm.signbit >= 0
 
-    @given(integers(0, 255),
-           integers(0, 255),
-           integers(0, 255),
-           integers(0, 255))
-    def test_negate_non_zero(self, a, b, c, d):
-        ibm = IBMFloat.from_bytes((a, b, c, d))
+    def test_abs_non_standard_zero(self):
+        for b in (b'\x33\x00\x00\x00', b'\xb3\x00\x00\x00'):
+            assert bytes(abs(IBMFloat(b))) == IBM_ZERO_BYTES
+
+    @given(binary(min_size=4, max_size=4))
+    def test_negate_non_zero(self, b):
+        ibm = IBMFloat.from_bytes(b)
         assume(not ibm.is_zero())
         negated = -ibm
         assert ibm.signbit != negated.signbit
@@ -429,8 +510,7 @@ class TestIBMFloat:
 
     @given(a=integers(min_value=1, max_value=255))
     def test_is_subnormal(self, a):
-        buffer = bytes([a, 0, 0, 0])
-        ibm = IBMFloat(buffer)
+        ibm = IBMFloat.from_u32(a << 24)
         assert ibm.is_subnormal()
 
     @given(f=ibm_compatible_floats())
@@ -446,9 +526,8 @@ class TestIBMFloat:
 
     @given(a=integers(min_value=1, max_value=255))
     def test_subnormal_equal(self, a):
-        buffer = bytes([a, 0, 0, 0])
-        p = IBMFloat(buffer)
-        q = IBMFloat(buffer)
+        p = IBMFloat.from_u32(a << 24)
+        q = IBMFloat.from_u32(a << 24)
         assert p == q
 
     def test_positive_half_equal(self):
@@ -530,6 +609,27 @@ class TestIBMFloat:
         q = None
         assert p != q
 
+    def test_equality_differently_normalized(self):
+        p = IBMFloat(bytes((0x41, 0x10, 0x00, 0x00)))
+        q = IBMFloat(bytes((0x42, 0x01, 0x00, 0x00)))
+        assert p == q
+
+    def test_equality_partially_normalizable_subnormal(self):
+        p = IBMFloat(bytes((0x01, 0x00, 0x00, 0x01)))
+        assert p.is_subnormal()
+        q = IBMFloat(bytes((0x00, 0x00, 0x00, 0x10)))
+        assert p == q
+
+    def test_subnormals_differing_in_last_place_are_not_equal(self):
+        p = IBMFloat(bytes((0x00, 0x0f, 0x00, 0x01)))
+        q = IBMFloat(bytes((0x01, 0x00, 0xf0, 0x00)))
+        assert p != q
+
+    @given(ibm_compatible_floats())
+    def test_from_float_is_normalized(self, f):
+        ibm = IBMFloat.from_float(f)
+        assert bytes(ibm.try_normalize()) == bytes(ibm)
+
     def test_equality_normalizable_subnormal(self):
         p = IBMFloat(bytes((0x10, 0x04, 0x00, 0x00)))
         assert p.is_subnormal()
@@ -572,6 +672,70 @@ class TestIBMFloat:
 
         assert almost_equal(ieee_c, ibm_c, epsilon=EPSILON_IBM_FLOAT)
 
+    @given(integers(0, 0xffffffff), integers(0, 0xffffffff))
+    def test_add_agrees_with_float_addition(self, a, b):
+        ibm_a = IBMFloat.from_u32(a)
+        ibm_b = IBMFloat.from_u32(b)
+        try:
+            expected = IBMFloat.from_float_without_underflow(float(ibm_a) + float(ibm_b))
+        except OverflowError:
+            with raises(OverflowError):
+                ibm_a + ibm_b
+        else:
+            assert bytes(ibm_a + ibm_b) == bytes(expected)
+
+    @given(integers(0, 0xffffffff), integers(0, 0xffffffff))
+    def test_sub_agrees_with_float_subtraction(self, a, b):
+        ibm_a = IBMFloat.from_u32(a)
+        ibm_b = IBMFloat.from_u32(b)
+        try:
+            expected = IBMFloat.from_float_without_underflow(float(ibm_a) - float(ibm_b))
+        except OverflowError:
+            with raises(OverflowError):
+                ibm_a - ibm_b
+        else:
+            assert bytes(ibm_a - ibm_b) == bytes(expected)
+
+    def test_add_exponents_seven_nybbles_apart_uses_integer_arithmetic(self):
+        assert _add_u32(0x41100000, 0xba100000) == 0x40ffffff
+        ibm = IBMFloat.from_u32(0x41100000) - IBMFloat.from_u32(0x3a100000)
+        assert bytes(ibm) == bytes((0x40, 0xff, 0xff, 0xff))
+
+    def test_add_exponents_eight_nybbles_apart_uses_float_arithmetic(self):
+        assert _add_u32(0x41100000, 0xb9100000) is None
+        ibm = IBMFloat.from_u32(0x41100000) - IBMFloat.from_u32(0x39100000)
+        assert bytes(ibm) == bytes((0x40, 0xff, 0xff, 0xff))
+
+    def test_add_exponents_far_apart_rounds_like_float(self):
+        ibm = IBMFloat.from_u32(0x41100000) - IBMFloat.from_u32(0x20100000)
+        assert bytes(ibm) == bytes((0x41, 0x10, 0x00, 0x00))
+
+    def test_add_carry_into_new_nybble(self):
+        ibm = IBMFloat.from_u32(0x41ffffff) + IBMFloat.from_u32(0x41000001)
+        assert bytes(ibm) == bytes((0x42, 0x10, 0x00, 0x00))
+
+    def test_add_cancellation_to_zero(self):
+        ibm = IBMFloat.from_u32(0x42123456) + IBMFloat.from_u32(0xc2123456)
+        assert bytes(ibm) == IBM_ZERO_BYTES
+
+    @given(integers(0, 0xffffffff))
+    def test_sub_self_is_zero(self, a):
+        ibm = IBMFloat.from_u32(a)
+        assert bytes(ibm - ibm) == IBM_ZERO_BYTES
+
+    def test_add_subnormals_at_minimum_exponent(self):
+        ibm = IBMFloat.from_u32(0x00000001) + IBMFloat.from_u32(0x00000001)
+        assert bytes(ibm) == bytes((0x00, 0x00, 0x00, 0x02))
+
+    def test_sub_normals_giving_subnormal_at_minimum_exponent(self):
+        ibm = IBMFloat.from_u32(0x00100001) - IBMFloat.from_u32(0x00100000)
+        assert bytes(ibm) == bytes((0x00, 0x00, 0x00, 0x01))
+
+    def test_add_overflow_raises_overflow_error(self):
+        ibm_max = IBMFloat.from_float(MAX_IBM_FLOAT)
+        with raises(OverflowError):
+            ibm_max + ibm_max
+
     @given(ibm_compatible_floats())
     def test_repr(self, f):
         ibm = IBMFloat.from_float(f)
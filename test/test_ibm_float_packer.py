@@ -5,8 +5,8 @@ from unittest.mock import MagicMock, patch
 
 from segpy import ibm_float_packer
 from segpy.ibm_float import EPSILON_IBM_FLOAT, ieee2ibm
-from segpy.util import almost_equal
 
+from test.predicates import all_almost_equal
 from test.test_float import ibm_compatible_floats
 import test.util
 
@@ -39,10 +39,7 @@ class TestPackIBMFloat:
     def test_roundtrip(self, data):
         packed = ibm_float_packer.pack_ibm_floats(data)
         unpacked = ibm_float_packer.unpack_ibm_floats(packed, len(data))
-        for f, u in zip(data, unpacked):
-            assert almost_equal(
-                f, float(u),
-                epsilon=EPSILON_IBM_FLOAT)
+        assert all_almost_equal(data, [float(u) for u in unpacked], epsilon=EPSILON_IBM_FLOAT)
 
 
 @pytest.mark.usefixtures("ibm_floating_point_impls")
@@ -61,6 +58,10 @@ class TestUnpackIBMFloat:
         packed = ibm_float_packer.pack_ibm_floats(unpacked)
         assert bytes(byte_data) == bytes(packed)
 
+    def test_unpack_too_few_bytes_raises_value_error(self):
+        with pytest.raises(ValueError):
+            ibm_float_packer.unpack_ibm_floats(ieee2ibm(1.0)[:3], 1)
+
 
 class TestPackImplementationSelection:
     """This tests whether the correct pack implementation is selected.
@@ -90,6 +91,18 @@ class TestPackImplementationSelection:
             mgr.__getitem__.return_value.obj.pack.assert_called_with(data)
             python_packer.return_value.pack.assert_not_called()
 
+    @patch('segpy.ibm_float_packer._EXTENSION_MANAGER')
+    @patch('segpy.ibm_float_packer.Packer')
+    def test_numpy_pack_used_when_cpp_unavailable(self, python_packer, mgr):
+        # Let the manager report that it contains 'numpy' but not 'cpp'
+        mgr.__contains__ = MagicMock(side_effect=lambda name: name == 'numpy')
+
+        data = byte_arrays_of_floats().example()
+        with test.util.force_python_ibm_float(False):
+            ibm_float_packer.pack_ibm_floats(data)
+            mgr.__getitem__.assert_called_once_with('numpy')
+            mgr.__getitem__.return_value.obj.pack.assert_called_with(data)
+            python_packer.return_value.pack.assert_not_called()
 
     @patch('segpy.ibm_float_packer._EXTENSION_MANAGER')
     @patch('segpy.ibm_float_packer.Packer')
@@ -129,6 +142,19 @@ class TestUnpackImplementationSelection:
             mgr.__getitem__.return_value.obj.unpack.assert_called_with(*data)
             python_packer.return_value.unpack.assert_not_called()
 
+    @patch('segpy.ibm_float_packer._EXTENSION_MANAGER')
+    @patch('segpy.ibm_float_packer.Packer')
+    def test_numpy_unpack_used_when_cpp_unavailable(self, python_packer, mgr):
+        # Let the manager report that it contains 'numpy' but not 'cpp'
+        mgr.__contains__ = MagicMock(side_effect=lambda name: name == 'numpy')
+
+        data = byte_arrays_of_floats().example()
+        with test.util.force_python_ibm_float(False):
+            ibm_float_packer.unpack_ibm_floats(*data)
+            mgr.__getitem__.assert_called_once_with('numpy')
+            mgr.__getitem__.return_value.obj.unpack.assert_called_with(*data)
+            python_packer.return_value.unpack.assert_not_called()
+
     @patch('segpy.ibm_float_packer._EXTENSION_MANAGER')
     @patch('segpy.ibm_float_packer.Packer')
     def test_python_unpack_used_as_fallback(self, python_packer, mgr):
@@ -4,8 +4,8 @@ import segpy.ibm_float_packer
 
 @contextmanager
 def force_python_ibm_float(force):
-    """Configure segpy to run with and without the C++ implementation of IBM
-    floating point un/packing.
+    """Configure segpy to run with and without the C++ or Numpy implementation
+    of IBM floating point un/packing, whichever is installed.
     """
     orig = segpy.ibm_float_packer.force_python_ibm_floats
     segpy.ibm_float_packer.force_python_ibm_floats = force